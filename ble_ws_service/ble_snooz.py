@@ -13,9 +13,21 @@ from pysnooz.model import SnoozAdvertisementData, SnoozDeviceModel, SnoozFirmwar
 from pysnooz.device import SnoozDevice
 from pysnooz import get_device_display_name  # exported by pysnooz/__init__.py
 
+from jsonutil import dumps
+
 
 _LOGGER = logging.getLogger(__name__)
 
+# firmware reported by the original (pre-Pro) Snooz
+_ORIGINAL_FIRMWARE_VERSIONS = frozenset(
+    {
+        SnoozFirmwareVersion.V2,
+        SnoozFirmwareVersion.V3,
+        SnoozFirmwareVersion.V4,
+        SnoozFirmwareVersion.V5,
+    }
+)
+
 
 @dataclass
 class DiscoveredSnooz:
@@ -36,6 +48,29 @@ def _parse_firmware_flags(flags: int) -> tuple[Optional[SnoozFirmwareVersion], b
     return fw, is_pairing
 
 
+# Keep it simple:
+# - Breez advertising name usually starts with "Breez"
+# - otherwise treat as Snooz/Pro-family
+def _breez_model(fw: SnoozFirmwareVersion) -> SnoozDeviceModel:
+    return SnoozDeviceModel.BREEZ
+
+
+def _snooz_model(fw: SnoozFirmwareVersion) -> SnoozDeviceModel:
+    # newer Snooz (v6+) usually reported as PRO in pysnooz; older = ORIGINAL
+    return SnoozDeviceModel.ORIGINAL if fw in _ORIGINAL_FIRMWARE_VERSIONS else SnoozDeviceModel.PRO
+
+
+def _unknown_model(fw: SnoozFirmwareVersion) -> SnoozDeviceModel:
+    # unknown name; best-effort
+    return SnoozDeviceModel.PRO if fw == SnoozFirmwareVersion.V6 else SnoozDeviceModel.UNSUPPORTED
+
+
+_MODEL_BY_NAME_PREFIX: dict[str, Callable[[SnoozFirmwareVersion], SnoozDeviceModel]] = {
+    "breez": _breez_model,
+    "snooz": _snooz_model,
+}
+
+
 def parse_snooz_advertisement_from_bleak(
     name: str,
     adv: AdvertisementData,
@@ -44,45 +79,28 @@ def parse_snooz_advertisement_from_bleak(
     """
     Build SnoozAdvertisementData using Bleak AdvertisementData.
     We *always* inject the configured password (even if device is not in pairing mode).
+
+    Runs for every advertisement seen while scanning, so the cheap rejects come first.
     """
-    mfg = adv.manufacturer_data or {}
-    payload: Optional[bytes] = None
+    mfg = adv.manufacturer_data
+    if not mfg:
+        return None
 
     # Snooz often uses 0xFFFF (65535). If not present, fall back to first entry.
-    if 0xFFFF in mfg:
-        payload = mfg[0xFFFF]
-    elif len(mfg) > 0:
+    payload = mfg.get(0xFFFF)
+    if payload is None:
         payload = next(iter(mfg.values()))
 
-    if not payload or len(payload) != SNOOZ_ADVERTISEMENT_LENGTH:
+    if len(payload) != SNOOZ_ADVERTISEMENT_LENGTH:
         return None
 
     fw, _is_pairing = _parse_firmware_flags(payload[0])
     if fw is None:
         return None
 
-    # Model inference: pysnooz uses name + firmware. Keep it simple:
-    # - Breez advertising name usually starts with "Breez"
-    # - otherwise treat as Snooz/Pro-family
-    lower = (name or "").lower()
-    if lower.startswith("breez"):
-        model = SnoozDeviceModel.BREEZ
-    elif lower.startswith("snooz"):
-        # newer Snooz (v6+) usually reported as PRO in pysnooz; older = ORIGINAL
-        if fw in (
-            SnoOZ_FIRMWARE_VERSIONS := (
-                SnoozFirmwareVersion.V2,
-                SnoozFirmwareVersion.V3,
-                SnoozFirmwareVersion.V4,
-                SnoozFirmwareVersion.V5,
-            )
-        ):
-            model = SnoozDeviceModel.ORIGINAL
-        else:
-            model = SnoozDeviceModel.PRO
-    else:
-        # unknown name; best-effort
-        model = SnoozDeviceModel.PRO if fw == SnoozFirmwareVersion.V6 else SnoozDeviceModel.UNSUPPORTED
+    # Model inference: pysnooz uses name + firmware; dispatch on the (5-char) name prefix.
+    infer = _MODEL_BY_NAME_PREFIX.get(name[:5].lower(), _unknown_model) if name else _unknown_model
+    model = infer(fw)
 
     if model == SnoozDeviceModel.UNSUPPORTED:
         return None
@@ -99,6 +117,9 @@ class BleSnooz:
     Thin wrapper around pysnooz.SnoozDevice that also provides:
       - discovery binding (BLEDevice + adv parsing)
       - snapshot formatting for WS events
+
+    State callbacks are called as cb(event, payload): the event dict already has the WS
+    broadcast shape and payload is its JSON encoding, serialized once per emit.
     """
 
     def __init__(self, device_name: str, address: str, password_hex: str, match_name: Optional[str] = None) -> None:
@@ -109,12 +130,18 @@ class BleSnooz:
 
         self._device: Optional[SnoozDevice] = None
         self._discovered: Optional[DiscoveredSnooz] = None
-        self._state_callbacks: list[Callable[[dict], Any]] = []
+        self._store: Any = None
+        self._state_callbacks: list[Callable[[dict, bytes], Any]] = []
         self._unsubscribe: Optional[Callable[[], None]] = None
+        self._snapshot_base: Optional[dict] = None
+
+        # serializes BLE commands to this device (see SnoozManager._with_ble_lock)
+        self._op_sem = asyncio.Semaphore(1)
 
-        # coalesce rapid state changes
-        self._event_task: Optional[asyncio.Task] = None
-        self._event_lock = asyncio.Lock()
+        # coalesce rapid state changes: callbacks mark us dirty, one long-lived task emits
+        self._dirty = asyncio.Event()
+        self._emitter_task: Optional[asyncio.Task] = None
+        self._last_emit_key: Optional[tuple] = None
 
     def is_ready(self) -> bool:
         return self._device is not None and self._discovered is not None
@@ -134,10 +161,14 @@ class BleSnooz:
             display_name=display_name,
         )
         self._device = SnoozDevice(ble_device, snooz_adv)
+        # pysnooz state store used by refresh_state(); lives as long as the SnoozDevice
+        # (its _api is not cached: pysnooz recreates it on every connection)
+        self._store = getattr(self._device, "_store", None)
         _LOGGER.info("[%s] Bound discovery: %s (%s)", self.device_name, display_name, ble_device.address)
 
         # Always record the discovered address (on macOS this will be a UUID-like value)
         self.address = ble_device.address.upper()
+        self._snapshot_base = self._build_snapshot_base()
 
         # subscribe to state changes for WS events
         self._unsubscribe = self._device.subscribe_to_state_change(self._on_state_change)
@@ -171,13 +202,13 @@ class BleSnooz:
 
         This uses pysnooz internals:
           - self._device._api.async_read_state()
-          - self._device._store.patch(...)
+          - self._device._store.patch(...) (bound once in bind_discovery)
         """
         if not self._device or not self._device.is_connected:
             return
 
         api = getattr(self._device, "_api", None)
-        store = getattr(self._device, "_store", None)
+        store = self._store
 
         if api is None or store is None:
             _LOGGER.debug("[%s] refresh_state: api/store not available", self.device_name)
@@ -191,8 +222,13 @@ class BleSnooz:
             self._on_state_change()
 
     async def stop(self) -> None:
-        if self._event_task and not self._event_task.done():
-            self._event_task.cancel()
+        if self._emitter_task and not self._emitter_task.done():
+            self._emitter_task.cancel()
+            try:
+                await self._emitter_task
+            except asyncio.CancelledError:
+                pass
+        self._emitter_task = None
 
         if self._unsubscribe:
             try:
@@ -207,47 +243,98 @@ class BleSnooz:
             except Exception:
                 _LOGGER.debug("[%s] Error during disconnect", self.device_name, exc_info=True)
 
-    def register_state_callback(self, cb: Callable[[dict], Any]) -> None:
+    def register_state_callback(self, cb: Callable[[dict, bytes], Any]) -> None:
         self._state_callbacks.append(cb)
+        if self._emitter_task is None:
+            self._emitter_task = asyncio.create_task(self._emit_loop())
 
     def snapshot(self) -> dict:
-        disc = self._discovered
+        base = self._snapshot_base
+        if base is None:
+            base = self._build_snapshot_base()
+
         dev = self._device
         state: SnoozDeviceState | None = dev.state if dev else None
 
+        snap = base.copy()
+        snap["connected"] = bool(dev and dev.is_connected)
+        snap["connection_status"] = dev.connection_status.name if dev else "UNKNOWN"
+        snap["state"] = {
+            "on": state.on if state else None,
+            "volume": state.volume if state else None,
+            "light_on": state.light_on if state else None,
+            "light_brightness": state.light_brightness if state else None,
+            "night_mode_enabled": state.night_mode_enabled if state else None,
+        }
+        return snap
+
+    def _build_snapshot_base(self) -> dict:
+        """
+        Fields of snapshot() that only change on bind_discovery; the mutable ones are placeholders
+        here so the key order stays stable when snapshot() overwrites them.
+        """
+        disc = self._discovered
         return {
             "device_name": self.device_name,
             "address": self.address,
             "display_name": disc.display_name if disc else None,
-            "connected": bool(dev and dev.is_connected),
-            "connection_status": dev.connection_status.name if dev else "UNKNOWN",
+            "connected": False,
+            "connection_status": "UNKNOWN",
             "model": disc.snooz_adv.model.name if disc else None,
             "firmware_version": disc.snooz_adv.firmware_version.name if disc else None,
-            "state": {
-                "on": state.on if state else None,
-                "volume": state.volume if state else None,
-                "light_on": state.light_on if state else None,
-                "light_brightness": state.light_brightness if state else None,
-                "night_mode_enabled": state.night_mode_enabled if state else None,
-            },
+            "state": None,
         }
 
     def _on_state_change(self) -> None:
         """
-        pysnooz may fire multiple callbacks quickly; coalesce into one WS event.
+        pysnooz may fire multiple callbacks quickly; _emit_loop coalesces them into one WS event.
         """
-        async def _emit():
-            async with self._event_lock:
-                await asyncio.sleep(0.25)
-                event = {"type": "device_state", "device_name": self.device_name, "state": self.snapshot()}
-                for cb in self._state_callbacks:
-                    try:
-                        maybe_coro = cb(event)
-                        if asyncio.iscoroutine(maybe_coro):
-                            await maybe_coro
-                    except Exception:
-                        _LOGGER.debug("[%s] state callback error", self.device_name, exc_info=True)
-
-        if self._event_task and not self._event_task.done():
-            self._event_task.cancel()
-        self._event_task = asyncio.create_task(_emit())
+        self._dirty.set()
+
+    async def _emit_loop(self) -> None:
+        while True:
+            await self._dirty.wait()
+            await asyncio.sleep(0.25)
+
+            # clear before snapshotting: anything arriving from here on triggers another emit
+            self._dirty.clear()
+            try:
+                await self._emit_state()
+            except Exception:
+                # this task lives as long as the device; a bad emit must not end it
+                _LOGGER.exception("[%s] Failed to emit device_state", self.device_name)
+
+    async def _emit_state(self) -> None:
+        snap = self.snapshot()
+
+        # pysnooz also notifies on repeated identical values; don't re-broadcast those
+        state = snap["state"]
+        key = (
+            state["on"],
+            state["volume"],
+            state["light_on"],
+            state["light_brightness"],
+            state["night_mode_enabled"],
+            snap["connected"],
+            snap["connection_status"],
+        )
+        if key == self._last_emit_key:
+            return
+
+        event = {
+            "type": "event",
+            "event": "device_state",
+            "device_name": self.device_name,
+            "state": snap,
+        }
+        payload = dumps(event)
+        # only remembered once encoded, so a failed emit is retried on the next change
+        self._last_emit_key = key
+
+        for cb in self._state_callbacks:
+            try:
+                maybe_coro = cb(event, payload)
+                if asyncio.iscoroutine(maybe_coro):
+                    await maybe_coro
+            except Exception:
+                _LOGGER.debug("[%s] state callback error", self.device_name, exc_info=True)
@@ -28,8 +28,20 @@ class ServiceConfig:
     devices: List[SnoozDeviceConfig]
 
 
+# separators people commonly paste between hex bytes
+_HEX_SEPARATORS = str.maketrans("", "", " \t\r\n:-_")
+_HEX_DIGITS = frozenset("0123456789abcdef")
+
+
 def _normalize_hex_password(value: str) -> str:
-    cleaned = "".join(ch for ch in value.strip().lower() if ch in "0123456789abcdef")
+    cleaned = value.strip().lower().translate(_HEX_SEPARATORS)
+    if cleaned.startswith("0x"):
+        cleaned = cleaned[2:]
+    # checked against the alphabet rather than bytes.fromhex(), which silently skips any
+    # whitespace (e.g. \x0b) and would let it through into the returned value
+    if not _HEX_DIGITS.issuperset(cleaned):
+        bad = next(ch for ch in cleaned if ch not in _HEX_DIGITS)
+        raise ValueError(f"Invalid Snooz password: {bad!r} is not a hex digit")
     if len(cleaned) != 16:
         raise ValueError(f"Invalid Snooz password hex length: expected 16 hex chars, got {len(cleaned)}")
     return cleaned
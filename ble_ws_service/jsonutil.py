@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson is in requirements.txt; stdlib json keeps things working without it
+    orjson = None
+    import json
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError (and ValueError)
+JSONDecodeError = orjson.JSONDecodeError if orjson is not None else json.JSONDecodeError
+
+
+# Picked once at import so callers hit the C functions directly, with no per-call dispatch.
+#   dumps(obj) -> compact JSON as UTF-8 bytes
+#   loads(data) -> parsed JSON from str or UTF-8 bytes
+if orjson is not None:
+    dumps = orjson.dumps
+    loads = orjson.loads
+else:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    loads = json.loads
@@ -4,6 +4,11 @@ import asyncio
 import logging
 import signal
 
+try:
+    import uvloop  # faster event loop; not available on Windows
+except ImportError:
+    uvloop = None
+
 from version import __version__
 from config import load_config
 from ble_snooz import BleSnooz
@@ -41,11 +46,18 @@ async def main() -> None:
     await manager.start()
     await ws.start()
 
-    stop_event = asyncio.Event()
+    main_task = asyncio.current_task()
+    shutting_down = False
 
     def _handle_signal(signame):
+        nonlocal shutting_down
+        # a repeated Ctrl-C / SIGTERM must not cancel the cleanup awaits below
+        if shutting_down:
+            _LOGGER.info("Received signal %s: already shutting down", signame)
+            return
+        shutting_down = True
         _LOGGER.info("Received signal %s: shutting down", signame)
-        stop_event.set()
+        main_task.cancel()
 
     loop = asyncio.get_running_loop()
     for sig in (signal.SIGINT, signal.SIGTERM):
@@ -54,12 +66,18 @@ async def main() -> None:
         except NotImplementedError:
             pass
 
-    await stop_event.wait()
-
-    await ws.stop()
-    await manager.stop()
+    try:
+        await asyncio.Future()  # park until a signal cancels us
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await ws.stop()
+        await manager.stop()
 
 
 if __name__ == "__main__":
     _LOGGER.info("Starting Snooz BLE WS Service version %s", __version__)
-    asyncio.run(main())
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
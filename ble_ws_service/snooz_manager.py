@@ -2,12 +2,14 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import sys
 from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 from dataclasses import asdict, is_dataclass
 from datetime import timedelta
 from enum import Enum
 
 from bleak import BleakScanner
+from bleak.assigned_numbers import AdvertisementDataType
 from bleak.backends.device import BLEDevice
 from bleak.backends.scanner import AdvertisementData
 
@@ -25,7 +27,30 @@ from ble_snooz import BleSnooz
 
 _LOGGER = logging.getLogger(__name__)
 
-EventListener = Callable[[dict], Awaitable[None]]
+# (event, payload): payload is the event already serialized to JSON bytes by BleSnooz
+EventListener = Callable[[dict, bytes], Awaitable[None]]
+
+# BlueZ passive scanning needs at least one advertisement monitor pattern:
+# manufacturer data starting with the 0xFFFF company id that Snooz advertises with.
+_SNOOZ_OR_PATTERNS = [(0, AdvertisementDataType.MANUFACTURER_SPECIFIC_DATA, b"\xff\xff")]
+
+_STATUS_NAMES: Dict[SnoozCommandResultStatus, str] = {status: status.name for status in SnoozCommandResultStatus}
+
+
+def _to_jsonable(obj: Any) -> Any:
+    if obj is None:
+        return None
+    if isinstance(obj, timedelta):
+        return obj.total_seconds()
+    if isinstance(obj, Enum):
+        return obj.name
+    if is_dataclass(obj):
+        return {k: _to_jsonable(v) for k, v in asdict(obj).items()}
+    if isinstance(obj, dict):
+        return {k: _to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_to_jsonable(v) for v in obj]
+    return obj
 
 
 class SnoozManager:
@@ -35,20 +60,28 @@ class SnoozManager:
       - scanning for configured devices
       - event listeners (e.g. WebSocket server)
 
-    Uses a global BLE op semaphore to avoid overlapping BLE commands across devices,
-    mirroring your August design. :contentReference[oaicite:3]{index=3}
+    BLE commands are serialized per device (each BleSnooz owns its op semaphore), so commands
+    to different devices run in parallel over their independent GATT connections.
     """
 
-    RESCAN_INTERVAL_SECONDS = 30.0
+    INITIAL_DISCOVERY_TIMEOUT_SECONDS = 12.0
+    HEALTH_CHECK_INTERVAL_SECONDS = 30.0
 
     def __init__(self) -> None:
         self._devices: Dict[str, BleSnooz] = {}
-        self._event_listeners: List[EventListener] = []
+        self._event_listeners: Tuple[EventListener, ...] = ()
 
-        self._ble_op_sem = asyncio.Semaphore(1)
+        # one scanner for the manager's lifetime; advertisements are matched against these maps
+        self._scanner: Optional[BleakScanner] = None
+        self._addr_to_device_name: Dict[str, str] = {}
+        self._name_to_device_name: Dict[str, str] = {}
+        # set after BlueZ first refuses passive mode, so scanner restarts go straight to active
+        self._passive_unavailable = False
+        self._all_bound = asyncio.Event()
+        self._start_tasks: Set[asyncio.Task] = set()
 
         self._running = False
-        self._rescan_task: Optional[asyncio.Task] = None
+        self._health_task: Optional[asyncio.Task] = None
 
     # ----------------------------
     # registration
@@ -60,8 +93,17 @@ class SnoozManager:
         self._devices[dev.device_name] = dev
         dev.register_state_callback(self._broadcast_event)
 
+        # Matching rules per device:
+        #   - if dev.address is set: match BLEDevice.address (Linux MAC or macOS UUID)
+        #   - if dev.match_name is set: match AdvertisementData.local_name / BLEDevice.name
+        if dev.address:
+            self._addr_to_device_name[dev.address.upper()] = dev.device_name
+        if dev.match_name:
+            self._name_to_device_name[dev.match_name.strip().lower()] = dev.device_name
+
     def register_event_listener(self, listener: EventListener) -> None:
-        self._event_listeners.append(listener)
+        # rebuilt on (rare) registration so every broadcast can iterate it as-is
+        self._event_listeners = (*self._event_listeners, listener)
 
     # ----------------------------
     # accessors
@@ -84,141 +126,183 @@ class SnoozManager:
             return
         self._running = True
 
+        # Keep scanning for as long as we run: no start/stop churn on the adapter and no
+        # window where advertisements from a missing device are missed.
+        await self._start_scanner()
+
         await self._initial_discovery_and_connect()
 
-        self._rescan_task = asyncio.create_task(self._rescan_loop())
+        self._health_task = asyncio.create_task(self._health_check_loop())
 
     async def stop(self) -> None:
         self._running = False
 
-        if self._rescan_task and not self._rescan_task.done():
-            self._rescan_task.cancel()
+        if self._health_task and not self._health_task.done():
+            self._health_task.cancel()
+
+        if self._scanner:
+            try:
+                await self._scanner.stop()
+            except Exception:
+                _LOGGER.debug("Error stopping scanner", exc_info=True)
+            self._scanner = None
+
+        for task in list(self._start_tasks):
+            task.cancel()
 
         for dev in self._devices.values():
             await dev.stop()
 
     async def _initial_discovery_and_connect(self) -> None:
-        target_names = set(self._devices.keys())
-        found = await self._scan_for_targets(target_names, timeout=12.0)
-
-        for devname, (ble_dev, adv) in found.items():
-            dev = self._devices[devname]
-            if dev.bind_discovery(ble_dev, adv):
-                try:
-                    await dev.start()
-                except Exception:
-                    _LOGGER.exception("[%s] Start/connect failed", devname)
-
-        missing = sorted(target_names - set(found.keys()))
+        if not self._missing_device_names():
+            self._all_bound.set()
+
+        try:
+            await asyncio.wait_for(self._all_bound.wait(), timeout=self.INITIAL_DISCOVERY_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+        # let devices found so far finish connecting before the WS server starts serving them
+        if self._start_tasks:
+            await asyncio.gather(*self._start_tasks, return_exceptions=True)
+
+        missing = self._missing_device_names()
         if missing:
             _LOGGER.warning("Some devices not discovered at startup: %s", missing)
 
-    async def _rescan_loop(self) -> None:
+    async def _health_check_loop(self) -> None:
+        """
+        Discovery happens in _on_advertisement; while devices are still missing, this restarts
+        the scanner so a scan that died underneath us (bluetoothd restart, adapter reset, failed
+        start) is recovered. Nothing is touched once every device has been found.
+        """
         while self._running:
             try:
-                await asyncio.sleep(self.RESCAN_INTERVAL_SECONDS)
-
-                missing_names = {name for name, dev in self._devices.items() if not dev.is_ready()}
-                if not missing_names:
-                    continue
-
-                _LOGGER.info("Rescanning for missing devices: %s", sorted(missing_names))
-                found = await self._scan_for_targets(missing_names, timeout=8.0)
+                await asyncio.sleep(self.HEALTH_CHECK_INTERVAL_SECONDS)
 
-                for devname, (ble_dev, adv) in found.items():
-                    dev = self._devices[devname]
-                    if not dev.is_ready() and dev.bind_discovery(ble_dev, adv):
-                        try:
-                            await dev.start()
-                        except Exception:
-                            _LOGGER.exception("[%s] Start/connect failed after rescan", devname)
+                missing = self._missing_device_names()
+                if missing:
+                    _LOGGER.info("Still waiting for devices to advertise: %s", missing)
+                    await self._restart_scanner()
 
             except asyncio.CancelledError:
                 return
             except Exception:
-                _LOGGER.exception("Rescan loop error")
+                _LOGGER.exception("Health check loop error")
+
+    async def _restart_scanner(self) -> None:
+        # bleak has no reliable "is this scan still alive" check across backends, so a scanner
+        # that may have failed is simply replaced. On failure _scanner stays None and the next
+        # health check tries again.
+        scanner, self._scanner = self._scanner, None
+        if scanner is not None:
+            try:
+                await scanner.stop()
+            except Exception:
+                _LOGGER.debug("Error stopping scanner", exc_info=True)
 
-    async def _scan_for_targets(
-            self,
-            device_names: Set[str],
-            timeout: float,
-    ) -> Dict[str, Tuple[BLEDevice, AdvertisementData]]:
+        try:
+            await self._start_scanner()
+        except Exception:
+            _LOGGER.warning("BLE scanner restart failed; retrying in %.0fs",
+                            self.HEALTH_CHECK_INTERVAL_SECONDS, exc_info=True)
+
+    async def _start_scanner(self) -> None:
         """
-        Scan until we find all target devices (by address OR advertised name), or timeout.
+        Prefer passive scanning on Linux/BlueZ: everything we need is in the primary advertisement,
+        so skipping SCAN_REQ/SCAN_RSP halves the packets the adapter and callback have to handle.
 
-        Matching rules per device:
-          - if dev.address is set: match BLEDevice.address (Linux MAC or macOS UUID)
-          - if dev.match_name is set: match AdvertisementData.local_name / BLEDevice.name
+        Only used when every device is matched by address, since an advertised name may only be
+        sent in the scan response. Falls back to active scanning if BlueZ refuses passive mode
+        (e.g. no advertisement monitor support), and remembers that so the warning is logged once;
+        macOS/CoreBluetooth is always active.
         """
-        targets = set(device_names)
-        found: Dict[str, Tuple[BLEDevice, AdvertisementData]] = {}
-        done = asyncio.Event()
+        if (
+            sys.platform == "linux"
+            and not self._passive_unavailable
+            and all(dev.address for dev in self._devices.values())
+        ):
+            scanner = BleakScanner(
+                detection_callback=self._on_advertisement,
+                scanning_mode="passive",
+                bluez={"or_patterns": _SNOOZ_OR_PATTERNS},
+            )
+            try:
+                await scanner.start()
+                self._scanner = scanner
+                _LOGGER.info("BLE scanner started (passive)")
+                return
+            except Exception:
+                self._passive_unavailable = True
+                _LOGGER.warning("Passive BLE scanning unavailable; falling back to active", exc_info=True)
 
-        # Build lookup maps for quick matching
-        addr_to_device_name: Dict[str, str] = {}
-        name_to_device_name: Dict[str, str] = {}
+        scanner = BleakScanner(detection_callback=self._on_advertisement)
+        await scanner.start()
+        self._scanner = scanner
+        _LOGGER.info("BLE scanner started (active)")
 
-        for target_device_name in targets:
-            dev = self._devices[target_device_name]
+    def _missing_device_names(self) -> List[str]:
+        return sorted(name for name, dev in self._devices.items() if not dev.is_ready())
 
-            addr = getattr(dev, "address", "") or ""
-            if addr:
-                addr_to_device_name[addr.upper()] = target_device_name
+    def _on_advertisement(self, device: BLEDevice, adv: AdvertisementData) -> None:
+        # Called for every advertisement from every nearby device, so reject cheaply.
+        # bleak reports upper-case MACs (Linux) / UUIDs (macOS) and the map keys are upper-cased
+        # at insert, so the raw address is looked up as-is; names are only lowered if needed.
+        matched_device_name = self._addr_to_device_name.get(device.address)
 
-            match_name = getattr(dev, "match_name", None)
-            if match_name:
-                name_to_device_name[match_name.strip().lower()] = target_device_name
+        if matched_device_name is None and self._name_to_device_name:
+            adv_name = adv.local_name or device.name
+            if adv_name:
+                matched_device_name = self._name_to_device_name.get(adv_name.strip().lower())
 
-        def cb(device: BLEDevice, adv: AdvertisementData) -> None:
-            addr = (device.address or "").upper()
-            adv_name = (adv.local_name or device.name or "").strip()
-            adv_name_l = adv_name.lower()
+        if matched_device_name is None:
+            return
 
-            matched_device_name: Optional[str] = None
+        dev = self._devices[matched_device_name]
+        if dev.is_ready() or not dev.bind_discovery(device, adv):
+            return
 
-            if addr and addr in addr_to_device_name:
-                matched_device_name = addr_to_device_name[addr]
-            elif adv_name_l and adv_name_l in name_to_device_name:
-                matched_device_name = name_to_device_name[adv_name_l]
+        task = asyncio.create_task(self._start_device(dev))
+        self._start_tasks.add(task)
+        task.add_done_callback(self._start_tasks.discard)
 
-            if matched_device_name and matched_device_name not in found:
-                found[matched_device_name] = (device, adv)
-                if targets.issubset(found.keys()):
-                    done.set()
+        if not self._missing_device_names():
+            self._all_bound.set()
 
-        scanner = BleakScanner(detection_callback=cb)
-        await scanner.start()
+    async def _start_device(self, dev: BleSnooz) -> None:
         try:
-            try:
-                await asyncio.wait_for(done.wait(), timeout=timeout)
-            except asyncio.TimeoutError:
-                pass
-        finally:
-            await scanner.stop()
-
-        return found
+            await dev.start()
+        except Exception:
+            _LOGGER.exception("[%s] Start/connect failed", dev.device_name)
 
     # ----------------------------
     # broadcasting
     # ----------------------------
 
-    async def _broadcast_event(self, event: dict) -> None:
-        if not self._event_listeners:
+    async def _broadcast_event(self, event: dict, payload: bytes) -> None:
+        listeners = self._event_listeners
+        if not listeners:
             return
-        coros = [listener(event) for listener in list(self._event_listeners)]
-        await asyncio.gather(*coros, return_exceptions=True)
+        if len(listeners) == 1:
+            # common case (just the WS server): skip gather's Task/Future allocations
+            try:
+                await listeners[0](event, payload)
+            except Exception:
+                _LOGGER.debug("Event listener error", exc_info=True)
+            return
+        await asyncio.gather(*(listener(event, payload) for listener in listeners), return_exceptions=True)
 
     # ----------------------------
     # BLE op serialization helper
     # ----------------------------
 
-    async def _with_ble_lock(self, device_name: str, op_name: str, coro_factory):
-        async with self._ble_op_sem:
-            _LOGGER.debug("[%s] BLE op start: %s", device_name, op_name)
+    async def _with_ble_lock(self, dev: BleSnooz, op_name: str, coro_factory):
+        async with dev._op_sem:
+            _LOGGER.debug("[%s] BLE op start: %s", dev.device_name, op_name)
             try:
                 return await coro_factory()
             finally:
-                _LOGGER.debug("[%s] BLE op end: %s", device_name, op_name)
+                _LOGGER.debug("[%s] BLE op end: %s", dev.device_name, op_name)
 
     # ----------------------------
     # commands (volume/noise/light)
@@ -237,7 +321,7 @@ class SnoozManager:
             assert dev._device is not None
             return await dev._device.async_execute_command(turn_on(volume=volume))
 
-        return await self._with_ble_lock(device_name, "noise_on", _do)
+        return await self._with_ble_lock(dev, "noise_on", _do)
 
     async def cmd_noise_off(self, device_name: str, duration_s: Optional[float] = None) -> SnoozCommandResult:
         dev = self.get_device(device_name)
@@ -250,7 +334,7 @@ class SnoozManager:
                 return await dev._device.async_execute_command(turn_off())
             return await dev._device.async_execute_command(turn_off(duration=self._sec_to_timedelta(duration_s)))
 
-        return await self._with_ble_lock(device_name, "noise_off", _do)
+        return await self._with_ble_lock(dev, "noise_off", _do)
 
     async def cmd_set_volume(self, device_name: str, volume: int) -> SnoozCommandResult:
         dev = self.get_device(device_name)
@@ -263,7 +347,7 @@ class SnoozManager:
             assert dev._device is not None
             return await dev._device.async_execute_command(set_volume(volume))
 
-        return await self._with_ble_lock(device_name, "set_volume", _do)
+        return await self._with_ble_lock(dev, "set_volume", _do)
 
     async def cmd_light_on(self, device_name: str) -> SnoozCommandResult:
         dev = self.get_device(device_name)
@@ -274,7 +358,7 @@ class SnoozManager:
             assert dev._device is not None
             return await dev._device.async_execute_command(turn_light_on())
 
-        return await self._with_ble_lock(device_name, "light_on", _do)
+        return await self._with_ble_lock(dev, "light_on", _do)
 
     async def cmd_light_off(self, device_name: str) -> SnoozCommandResult:
         dev = self.get_device(device_name)
@@ -285,7 +369,7 @@ class SnoozManager:
             assert dev._device is not None
             return await dev._device.async_execute_command(turn_light_off())
 
-        return await self._with_ble_lock(device_name, "light_off", _do)
+        return await self._with_ble_lock(dev, "light_off", _do)
 
     async def cmd_set_light_brightness(self, device_name: str, brightness: int) -> SnoozCommandResult:
         dev = self.get_device(device_name)
@@ -298,7 +382,7 @@ class SnoozManager:
             assert dev._device is not None
             return await dev._device.async_execute_command(set_light_brightness(brightness))
 
-        return await self._with_ble_lock(device_name, "set_light_brightness", _do)
+        return await self._with_ble_lock(dev, "set_light_brightness", _do)
 
     # ----------------------------
     # result formatting
@@ -306,28 +390,14 @@ class SnoozManager:
 
     @staticmethod
     def result_to_dict(result: SnoozCommandResult) -> dict:
-        def to_jsonable(obj: Any) -> Any:
-            if obj is None:
-                return None
-            if isinstance(obj, timedelta):
-                return obj.total_seconds()
-            if isinstance(obj, Enum):
-                return obj.name
-            if is_dataclass(obj):
-                return {k: to_jsonable(v) for k, v in asdict(obj).items()}
-            if isinstance(obj, dict):
-                return {k: to_jsonable(v) for k, v in obj.items()}
-            if isinstance(obj, (list, tuple)):
-                return [to_jsonable(v) for v in obj]
-            return obj
-
+        # status/duration have fixed types; only a non-empty response needs the generic walk
         duration = getattr(result, "duration", None)
         response = getattr(result, "response", None)
 
         return {
-            "status": getattr(result.status, "name", str(result.status)),
-            "duration_s": to_jsonable(duration),  # timedelta -> seconds
-            "response": to_jsonable(response),  # recursively JSON-safe
+            "status": _STATUS_NAMES.get(result.status) or getattr(result.status, "name", str(result.status)),
+            "duration_s": None if duration is None else duration.total_seconds(),  # timedelta -> seconds
+            "response": None if response is None else _to_jsonable(response),  # recursively JSON-safe
         }
 
     @staticmethod
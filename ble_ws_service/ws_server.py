@@ -1,20 +1,94 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import hmac
 import logging
 import time
 from http import HTTPStatus
-from typing import Dict, Optional, Set
+from typing import Awaitable, Callable, Dict, Optional, Tuple
 
-from websockets.asyncio.server import serve, Server, ServerConnection
+from websockets.asyncio.server import broadcast, serve, Server, ServerConnection
 from websockets.exceptions import ConnectionClosed
-from websockets.server import Request
+from websockets.http11 import Request, Response
 
+from pysnooz.commands import SnoozCommandResult
+
+from jsonutil import JSONDecodeError, dumps, loads
 from snooz_manager import SnoozManager
 
 _LOGGER = logging.getLogger(__name__)
 
+# bound once: saves the module attribute lookup on every heartbeat
+_time = time.time
+
+# (manager, device_name, msg) -> response data
+CommandHandler = Callable[[SnoozManager, Optional[str], dict], Awaitable[Dict]]
+
+
+# ----------------------------
+# command handlers
+# ----------------------------
+
+def _command_result(result: SnoozCommandResult) -> Dict:
+    SnoozManager.ensure_success(result)
+    return SnoozManager.result_to_dict(result)
+
+
+async def _cmd_heartbeat(manager: SnoozManager, device_name: Optional[str], msg: dict) -> Dict:
+    return {"server_time": _time()}
+
+
+async def _cmd_list_devices(manager: SnoozManager, device_name: Optional[str], msg: dict) -> Dict:
+    return {"devices": manager.get_device_names()}
+
+
+async def _cmd_get_state(manager: SnoozManager, device_name: Optional[str], msg: dict) -> Dict:
+    return await manager.cmd_get_state(device_name)
+
+
+async def _cmd_noise_on(manager: SnoozManager, device_name: Optional[str], msg: dict) -> Dict:
+    return _command_result(await manager.cmd_noise_on(device_name, volume=msg.get("volume")))
+
+
+async def _cmd_noise_off(manager: SnoozManager, device_name: Optional[str], msg: dict) -> Dict:
+    return _command_result(await manager.cmd_noise_off(device_name, duration_s=msg.get("duration_s")))
+
+
+async def _cmd_set_volume(manager: SnoozManager, device_name: Optional[str], msg: dict) -> Dict:
+    return _command_result(await manager.cmd_set_volume(device_name, volume=int(msg["volume"])))
+
+
+async def _cmd_light_on(manager: SnoozManager, device_name: Optional[str], msg: dict) -> Dict:
+    return _command_result(await manager.cmd_light_on(device_name))
+
+
+async def _cmd_light_off(manager: SnoozManager, device_name: Optional[str], msg: dict) -> Dict:
+    return _command_result(await manager.cmd_light_off(device_name))
+
+
+async def _cmd_set_light_brightness(manager: SnoozManager, device_name: Optional[str], msg: dict) -> Dict:
+    return _command_result(await manager.cmd_set_light_brightness(device_name, brightness=int(msg["brightness"])))
+
+
+_COMMAND_HANDLERS: Dict[str, CommandHandler] = {
+    "heartbeat": _cmd_heartbeat,
+    "list_devices": _cmd_list_devices,
+    "get_state": _cmd_get_state,
+    "noise_on": _cmd_noise_on,
+    "noise_off": _cmd_noise_off,
+    "set_volume": _cmd_set_volume,
+    "light_on": _cmd_light_on,
+    "light_off": _cmd_light_off,
+    "set_light_brightness": _cmd_set_light_brightness,
+}
+
+# commands that act on a single device and so require device_name
+_DEVICE_COMMANDS = frozenset(_COMMAND_HANDLERS) - {"heartbeat", "list_devices"}
+
+# Response envelopes are fixed; only the JSON-encoded request_id and data/error are spliced in.
+_OK_RESPONSE_TEMPLATE = b'{"type":"response","request_id":%b,"status":"ok","data":%b}'
+_ERROR_RESPONSE_TEMPLATE = b'{"type":"response","request_id":%b,"status":"error","error":%b}'
+
 
 class WebSocketServer:
     """
@@ -63,32 +137,44 @@ class WebSocketServer:
       }
     """
 
+    # per-client response queue bound; a client this far behind has stopped reading
+    OUTBOX_MAX_MESSAGES = 256
+
     def __init__(self, manager: SnoozManager, host: str, port: int, auth_token: Optional[str] = None) -> None:
         self._manager = manager
         self._host = host
         self._port = port
         self._auth_token = auth_token
-
-        self._clients: Set[ServerConnection] = set()
+        # full expected header value, compared in constant time against what clients send
+        self._expected_auth = f"Bearer {auth_token}".encode("utf-8") if auth_token else b""
+        # a header longer (in chars) than the expected value (in bytes) can never match
+        self._expected_auth_max_len = len(self._expected_auth)
+
+        # connected clients -> their response queue (drained by one writer task per client)
+        self._clients: Dict[ServerConnection, asyncio.Queue] = {}
+        # immutable copy for broadcasts; rebuilt only on connect/disconnect, never per event
+        self._clients_snapshot: Tuple[ServerConnection, ...] = ()
         self._server: Optional[Server] = None
 
         self._manager.register_event_listener(self._handle_manager_event)
 
-    async def _process_request(self, _connection: ServerConnection, request: Request):
+    async def _process_request(self, connection: ServerConnection, request: Request) -> Optional[Response]:
         if not self._auth_token:
             return None
 
+        # Cheap shape checks first so junk headers never reach the encode + digest compare.
         auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return (
-                HTTPStatus.UNAUTHORIZED,
-                [("WWW-Authenticate", "Bearer")],
-                b"Missing Authorization header\n",
-            )
+        if auth_header is None or len(auth_header) < 8 or auth_header[:7] != "Bearer ":
+            response = connection.respond(HTTPStatus.UNAUTHORIZED, "Missing Authorization header\n")
+            response.headers["WWW-Authenticate"] = "Bearer"
+            return response
 
-        token = auth_header.removeprefix("Bearer ").strip()
-        if token != self._auth_token:
-            return (HTTPStatus.FORBIDDEN, [], b"Invalid auth token\n")
+        if len(auth_header) > self._expected_auth_max_len:
+            return connection.respond(HTTPStatus.FORBIDDEN, "Invalid auth token\n")
+
+        # surrogateescape: header bytes that aren't valid text must still compare, not raise
+        if not hmac.compare_digest(auth_header.encode("utf-8", "surrogateescape"), self._expected_auth):
+            return connection.respond(HTTPStatus.FORBIDDEN, "Invalid auth token\n")
 
         return None
 
@@ -100,6 +186,8 @@ class WebSocketServer:
             process_request=self._process_request,
             ping_interval=30,
             ping_timeout=10,
+            # payloads are small JSON; per-message deflate would re-compress every broadcast per client
+            compression=None,
         )
         _LOGGER.info("WebSocket server listening on ws://%s:%d", self._host, self._port)
 
@@ -113,24 +201,31 @@ class WebSocketServer:
         await asyncio.gather(*coros, return_exceptions=True)
 
     async def _handler(self, websocket: ServerConnection):
-        self._clients.add(websocket)
+        outbox: asyncio.Queue = asyncio.Queue(maxsize=self.OUTBOX_MAX_MESSAGES)
+        self._clients[websocket] = outbox
+        self._clients_snapshot = tuple(self._clients)
+        writer = asyncio.create_task(self._writer(websocket, outbox))
         _LOGGER.info("Client connected (%d total)", len(self._clients))
 
         try:
-            async for raw in websocket:
+            while True:
+                # decode=False: hand the frame bytes straight to the JSON parser (which validates
+                # UTF-8 itself) instead of decoding every text frame to str first
+                raw = await websocket.recv(decode=False)
                 await self._handle_message(websocket, raw)
         except ConnectionClosed:
             pass
         except Exception:
             _LOGGER.exception("Client handler error")
         finally:
-            self._clients.discard(websocket)
+            self._remove_client(websocket)
+            writer.cancel()
             _LOGGER.info("Client disconnected (%d total)", len(self._clients))
 
-    async def _handle_message(self, websocket: ServerConnection, raw: str) -> None:
+    async def _handle_message(self, websocket: ServerConnection, raw: bytes) -> None:
         try:
-            msg = json.loads(raw)
-        except json.JSONDecodeError:
+            msg = loads(raw)
+        except (JSONDecodeError, UnicodeDecodeError):  # stdlib fallback reports bad UTF-8 separately
             await self._send_error(websocket, request_id=None, error="invalid_json")
             return
 
@@ -145,113 +240,72 @@ class WebSocketServer:
         device_name = msg.get("device_name")
 
         try:
-            if command == "heartbeat":
-                await self._send_ok(websocket, request_id=request_id, data={"server_time": time.time()})
-                return
-
-            if command == "list_devices":
-                await self._send_ok(websocket, request_id=request_id, data={"devices": self._manager.get_device_names()})
-                return
-
-            if command in (
-                "get_state",
-                "noise_on",
-                "noise_off",
-                "set_volume",
-                "light_on",
-                "light_off",
-                "set_light_brightness",
-            ) and not device_name:
+            # non-str commands (possibly unhashable lists/objects) are just unknown, not a TypeError
+            handler = _COMMAND_HANDLERS.get(command) if isinstance(command, str) else None
+            if handler is None:
+                raise ValueError(f"unknown_command: {command}")
+            if command in _DEVICE_COMMANDS and not device_name:
                 raise ValueError("device_name is required")
 
-            # --- get_state
-            if command == "get_state":
-                snap = await self._manager.cmd_get_state(device_name)
-                await self._send_ok(websocket, request_id=request_id, data=snap)
-                return
-
-            # --- noise/volume
-            if command == "noise_on":
-                volume = msg.get("volume")
-                result = await self._manager.cmd_noise_on(device_name, volume=volume)
-                self._manager.ensure_success(result)
-                await self._send_ok(websocket, request_id=request_id, data=self._manager.result_to_dict(result))
-                return
-
-            if command == "noise_off":
-                duration_s = msg.get("duration_s")
-                result = await self._manager.cmd_noise_off(device_name, duration_s=duration_s)
-                self._manager.ensure_success(result)
-                await self._send_ok(websocket, request_id=request_id, data=self._manager.result_to_dict(result))
-                return
-
-            if command == "set_volume":
-                volume = int(msg["volume"])
-                result = await self._manager.cmd_set_volume(device_name, volume=volume)
-                self._manager.ensure_success(result)
-                await self._send_ok(websocket, request_id=request_id, data=self._manager.result_to_dict(result))
-                return
-
-            # --- light
-            if command == "light_on":
-                result = await self._manager.cmd_light_on(device_name)
-                self._manager.ensure_success(result)
-                await self._send_ok(websocket, request_id=request_id, data=self._manager.result_to_dict(result))
-                return
-
-            if command == "light_off":
-                result = await self._manager.cmd_light_off(device_name)
-                self._manager.ensure_success(result)
-                await self._send_ok(websocket, request_id=request_id, data=self._manager.result_to_dict(result))
-                return
-
-            if command == "set_light_brightness":
-                brightness = int(msg["brightness"])
-                result = await self._manager.cmd_set_light_brightness(device_name, brightness=brightness)
-                self._manager.ensure_success(result)
-                await self._send_ok(websocket, request_id=request_id, data=self._manager.result_to_dict(result))
-                return
-
-            raise ValueError(f"unknown_command: {command}")
+            data = await handler(self._manager, device_name, msg)
+            await self._send_ok(websocket, request_id=request_id, data=data)
 
         except Exception as exc:
             _LOGGER.exception("Error handling command: %s", msg)
             await self._send_error(websocket, request_id=request_id, error=str(exc))
 
-    async def _handle_manager_event(self, event: dict) -> None:
+    async def _handle_manager_event(self, event: dict, payload: bytes) -> None:
         """
-        Manager event shape: {"type":"device_state","device_name":"...","state":{...}}
+        Manager event shape: {"type":"event","event":"device_state","device_name":"...","state":{...}}
+        payload is that event pre-serialized by BleSnooz, so it is sent as-is (no re-encode per event).
         Broadcast to all clients, same pattern as your August code. :contentReference[oaicite:5]{index=5}
         """
-        if not self._clients:
+        clients = self._clients_snapshot
+        if not clients:
             return
 
-        payload = {
-            "type": "event",
-            "event": "device_state",
-            "device_name": event["device_name"],
-            "state": event["state"],
-        }
-        msg = json.dumps(payload)
-        coros = [self._safe_send(ws, msg) for ws in list(self._clients)]
-        await asyncio.gather(*coros, return_exceptions=True)
+        # broadcast() writes the one frame to every open connection without awaiting or a Task
+        # per client, and skips connections that are closing. It takes str for TEXT frames.
+        broadcast(clients, payload.decode("utf-8"))
 
     async def _send_ok(self, websocket: ServerConnection, request_id: Optional[str], data: Dict) -> None:
-        response = {"type": "response", "request_id": request_id, "status": "ok", "data": data}
-        await self._safe_send(websocket, json.dumps(response))
+        # request_id goes through dumps() so any client-supplied value is escaped/typed correctly
+        data_json = dumps(data) if data else b"{}"
+        self._enqueue(websocket, _OK_RESPONSE_TEMPLATE % (dumps(request_id), data_json))
 
     async def _send_error(self, websocket: ServerConnection, request_id: Optional[str], error: str) -> None:
-        response = {"type": "response", "request_id": request_id, "status": "error", "error": error}
-        await self._safe_send(websocket, json.dumps(response))
+        self._enqueue(websocket, _ERROR_RESPONSE_TEMPLATE % (dumps(request_id), dumps(error)))
+
+    def _enqueue(self, ws: ServerConnection, msg: bytes) -> None:
+        outbox = self._clients.get(ws)
+        if outbox is None:
+            return
+        try:
+            outbox.put_nowait(msg)
+        except asyncio.QueueFull:
+            _LOGGER.warning("Client outbox full (%d messages); dropping message", self.OUTBOX_MAX_MESSAGES)
 
-    async def _safe_send(self, ws: ServerConnection, msg: str) -> None:
+    def _remove_client(self, ws: ServerConnection) -> None:
+        if self._clients.pop(ws, None) is not None:
+            self._clients_snapshot = tuple(self._clients)
+
+    async def _writer(self, ws: ServerConnection, outbox: asyncio.Queue) -> None:
+        """
+        Single writer per connection for responses: handlers only enqueue, and everything that
+        piled up is written back-to-back here so the transport can coalesce it.
+        (Events bypass this via broadcast(), see _handle_manager_event.)
+        """
         try:
-            await ws.send(msg)
+            while True:
+                msg = await outbox.get()
+                # text=True keeps pre-encoded bytes on a TEXT frame (Hubitat only parses text)
+                await ws.send(msg, text=True)
         except ConnectionClosed:
-            self._clients.discard(ws)
+            pass
         except Exception:
             _LOGGER.debug("Error sending to client", exc_info=True)
-            self._clients.discard(ws)
+        finally:
+            self._remove_client(ws)
 
     async def _safe_close(self, ws: ServerConnection, code: int = 1001, reason: str = "Server shutting down") -> None:
         try:
@@ -259,4 +313,4 @@ class WebSocketServer:
         except Exception:
             pass
         finally:
-            self._clients.discard(ws)
+            self._remove_client(ws)
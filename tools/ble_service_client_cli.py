@@ -11,15 +11,24 @@ import asyncio
 import json
 import logging
 import shlex
-import uuid
 from pprint import pprint
 from typing import Any, Callable, Dict, Optional
 
 from websockets.asyncio.client import connect
 from websockets.exceptions import ConnectionClosed
 
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # stdlib json also accepts bytes
+    _json_loads = json.loads
+
 _LOGGER = logging.getLogger(__name__)
 
+# Argument-less commands (list_devices, get_state, light_on, ...) have a fixed shape, so their
+# frames are formatted directly. request_id and command are ours; device_name is JSON-escaped.
+_COMMAND_TEMPLATE = '{"type":"command","request_id":"%s","command":"%s"}'
+_DEVICE_COMMAND_TEMPLATE = '{"type":"command","request_id":"%s","command":"%s","device_name":%s}'
+
 
 class SnoozWebSocketClient:
     def __init__(
@@ -35,7 +44,9 @@ class SnoozWebSocketClient:
         self.headers = headers or {}
 
         self._pending: Dict[str, asyncio.Future] = {}
+        self._next_request_id = 0  # request ids only need to be unique per client
         self._ws = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._listener_task = None
         self._running = False
         self._connected_event = asyncio.Event()
@@ -45,6 +56,7 @@ class SnoozWebSocketClient:
             return
 
         self._running = True
+        self._loop = asyncio.get_running_loop()
         self._listener_task = asyncio.create_task(self._run_forever())
 
         print("Connecting to WebSocket server...")
@@ -118,8 +130,10 @@ class SnoozWebSocketClient:
 
     async def _listen(self):
         try:
-            async for raw in self._ws:
-                msg = json.loads(raw)
+            while True:
+                # decode=False skips the UTF-8 decode of each text frame; JSON parsing validates it
+                raw = await self._ws.recv(decode=False)
+                msg = _json_loads(raw)
                 msg_type = msg.get("type")
 
                 if msg_type == "response":
@@ -134,7 +148,11 @@ class SnoozWebSocketClient:
 
                 if msg_type == "event":
                     if self.event_callback:
-                        asyncio.create_task(self.event_callback(msg))
+                        # awaited inline (no Task per event); callbacks are expected to be quick
+                        try:
+                            await self.event_callback(msg)
+                        except Exception:
+                            _LOGGER.exception("Event callback failed")
                     continue
 
                 _LOGGER.warning("Unknown message type received: %s", msg)
@@ -147,20 +165,28 @@ class SnoozWebSocketClient:
     async def _send_command(self, command: str, device_name: Optional[str] = None, **kwargs):
         await self._connected_event.wait()
 
-        request_id = uuid.uuid4().hex
-        future = asyncio.get_event_loop().create_future()
+        self._next_request_id += 1
+        request_id = str(self._next_request_id)
+        future = self._loop.create_future()
         self._pending[request_id] = future
 
-        payload = {
-            "type": "command",
-            "request_id": request_id,
-            "command": command,
-        }
-        if device_name:
-            payload["device_name"] = device_name
-        payload.update(kwargs)
-
-        await self._ws.send(json.dumps(payload))
+        if not kwargs:
+            if device_name:
+                frame = _DEVICE_COMMAND_TEMPLATE % (request_id, command, json.dumps(device_name))
+            else:
+                frame = _COMMAND_TEMPLATE % (request_id, command)
+        else:
+            payload = {
+                "type": "command",
+                "request_id": request_id,
+                "command": command,
+            }
+            if device_name:
+                payload["device_name"] = device_name
+            payload.update(kwargs)
+            frame = json.dumps(payload)
+
+        await self._ws.send(frame)
         return await future
 
 
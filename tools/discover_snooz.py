@@ -12,42 +12,42 @@ from bleak.backends.scanner import AdvertisementData
 from pysnooz.const import FIRMWARE_PAIRING_FLAGS, FIRMWARE_VERSION_BY_FLAGS, SNOOZ_ADVERTISEMENT_LENGTH
 
 
-def parse_password_if_pairing(adv: AdvertisementData) -> Optional[str]:
-    mfg = adv.manufacturer_data or {}
-    payload: Optional[bytes] = None
-    if 0xFFFF in mfg:
-        payload = mfg[0xFFFF]
-    elif len(mfg) > 0:
+def snooz_payload(adv: AdvertisementData) -> Optional[bytes]:
+    """
+    The manufacturer payload Snooz data is read from: the 0xFFFF entry, else the first one.
+    """
+    mfg = adv.manufacturer_data
+    if not mfg:
+        return None
+    payload = mfg.get(0xFFFF)
+    if payload is None:
         payload = next(iter(mfg.values()))
+    return payload
 
-    if not payload or len(payload) != SNOOZ_ADVERTISEMENT_LENGTH:
-        return None
+
+def parse_password_and_fw(adv: AdvertisementData) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Returns (pairing password hex, firmware name) from one pass over the manufacturer payload.
+    The password is only present while the device is in pairing mode.
+    """
+    payload = snooz_payload(adv)
+    if payload is None or len(payload) != SNOOZ_ADVERTISEMENT_LENGTH:
+        return None, None
 
     flags = payload[0]
     is_pairing = (FIRMWARE_PAIRING_FLAGS & flags) == FIRMWARE_PAIRING_FLAGS
-    if not is_pairing:
-        return None
+    fw = FIRMWARE_VERSION_BY_FLAGS.get(flags & ~FIRMWARE_PAIRING_FLAGS)
 
     # password is the remaining bytes
-    return payload[1:].hex()
-
-
-def parse_fw(adv: AdvertisementData) -> Optional[str]:
-    mfg = adv.manufacturer_data or {}
-    payload: Optional[bytes] = None
-    if 0xFFFF in mfg:
-        payload = mfg[0xFFFF]
-    elif len(mfg) > 0:
-        payload = next(iter(mfg.values()))
-    if not payload or len(payload) != SNOOZ_ADVERTISEMENT_LENGTH:
-        return None
-    flags_without_pairing = payload[0] & ~FIRMWARE_PAIRING_FLAGS
-    fw = FIRMWARE_VERSION_BY_FLAGS.get(flags_without_pairing)
-    return fw.name if fw else None
+    pw = payload[1:].hex() if is_pairing else None
+    return pw, fw.name if fw else None
 
 
 async def scan(timeout: float, match_mac: Optional[str]) -> Dict[str, Tuple[BLEDevice, AdvertisementData]]:
     found: Dict[str, Tuple[BLEDevice, AdvertisementData]] = {}
+    # addr -> (name, manufacturer payload) of the last advertisement we actually parsed
+    last_seen: Dict[str, Tuple[str, Optional[bytes]]] = {}
+    done = asyncio.Event()  # only set once the --mac device advertises its password
 
     def cb(device: BLEDevice, adv: AdvertisementData) -> None:
         addr = device.address.upper()
@@ -55,17 +55,33 @@ async def scan(timeout: float, match_mac: Optional[str]) -> Dict[str, Tuple[BLED
             return
 
         name = adv.local_name or device.name or ""
+
+        # devices re-advertise the same payload many times a second; only re-parse on change
+        # same payload the parser reads, so any change that could alter its result is re-parsed
+        key = (name, snooz_payload(adv))
+        if last_seen.get(addr) == key:
+            if addr in found:
+                found[addr] = (device, adv)  # keep the freshest adv (RSSI) for the report
+            return
+        last_seen[addr] = key
+
         # filter lightly: if it has the right manufacturer payload, keep it
-        pw = parse_password_if_pairing(adv)
-        fw = parse_fw(adv)
+        pw, fw = parse_password_and_fw(adv)
 
         if pw or fw or name.lower().startswith(("snooz", "breez")):
             found[addr] = (device, adv)
+            # only the password is worth stopping early for; keep scanning until the device
+            # enters pairing mode (or the timeout hits)
+            if match_mac and pw:
+                done.set()
 
     scanner = BleakScanner(detection_callback=cb)
     await scanner.start()
     try:
-        await asyncio.sleep(timeout)
+        try:
+            await asyncio.wait_for(done.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
     finally:
         await scanner.stop()
 
@@ -92,8 +108,7 @@ async def main() -> None:
     for addr, (dev, adv) in results.items():
         name = adv.local_name or dev.name or "(unknown)"
         rssi = getattr(adv, "rssi", None) or getattr(dev, "rssi", None)
-        fw = parse_fw(adv)
-        pw = parse_password_if_pairing(adv)
+        pw, fw = parse_password_and_fw(adv)
 
         print("------------------------------------------------------------")
         print(f"Name: {name}")